@@ -1,173 +1,270 @@
-"""
-Módulo com classes para otimização de empacotamento 3D em gaiolas ou contêineres.
-"""
-
-import math
-import itertools
-from dataclasses import dataclass
-from typing import Tuple, List, Dict
-
-
-@dataclass
-class Dimension3D:
-    """Classe para representar dimensões 3D."""
-    x: float
-    y: float
-    z: float
-
-    def as_tuple(self) -> Tuple[float, float, float]:
-        """Retorna as dimensões como uma tupla."""
-        return (self.x, self.y, self.z)
-
-
-class Container:
-    """Classe para representar um contêiner ou gaiola."""
-
-    def __init__(self, x: float, y: float, z: float, y_tolerance: float = 0):
-        """
-        Inicializa um contêiner com dimensões específicas.
-
-        Args:
-            x: Comprimento do contêiner (metros)
-            y: Profundidade do contêiner (metros)
-            z: Altura do contêiner (metros)
-            y_tolerance: Tolerância adicional na dimensão y (metros)
-        """
-        self.dimensions = Dimension3D(x, y, z)
-        self.y_tolerance = y_tolerance
-
-    @property
-    def effective_y(self) -> float:
-        """Retorna a profundidade efetiva com tolerância."""
-        return self.dimensions.y + self.y_tolerance
-
-
-class Product:
-    """Classe para representar um produto com dimensões 3D."""
-
-    def __init__(self, length: float, width: float, height: float):
-        """
-        Inicializa um produto com dimensões específicas.
-
-        Args:
-            length: Primeira dimensão do produto (metros)
-            width: Segunda dimensão do produto (metros)
-            height: Terceira dimensão do produto (metros)
-        """
-        self.dimensions = (length, width, height)
-
-    def get_orientations(self, lock_vertical: bool = False) -> List[Tuple[float, float, float]]:
-        """
-        Retorna todas as orientações possíveis para o produto.
-
-        Args:
-            lock_vertical: Se True, mantém a última dimensão fixa (vertical)
-
-        Returns:
-            Lista de orientações possíveis como tuplas (x, y, z)
-        """
-        if lock_vertical:
-            # Apenas permuta as duas primeiras dimensões, mantendo a terceira fixa
-            return [
-                (self.dimensions[0], self.dimensions[1], self.dimensions[2]),
-                (self.dimensions[1], self.dimensions[0], self.dimensions[2])
-            ]
-        else:
-            # Retorna todas as permutações possíveis
-            return list(itertools.permutations(self.dimensions))
-
-
-class PackingOptimizer:
-    """Classe para otimizar o empacotamento de produtos em um contêiner."""
-
-    def __init__(self, container: Container, product: Product, lock_vertical: bool = False):
-        """
-        Inicializa o otimizador com um contêiner e um produto.
-
-        Args:
-            container: O contêiner ou gaiola a ser preenchido
-            product: O produto a ser colocado no contêiner
-            lock_vertical: Se True, mantém a última dimensão do produto fixa
-        """
-        self.container = container
-        self.product = product
-        self.lock_vertical = lock_vertical
-        self.best_orientation = None
-        self.best_count = 0
-        self.best_distribution = (0, 0, 0)
-
-    def calculate_quantity(self, orientation: Tuple[float, float, float]) -> Tuple[int, Tuple[int, int, int]]:
-        """
-        Calcula a quantidade de produtos que cabem no contêiner com uma orientação específica.
-
-        Args:
-            orientation: Tupla com dimensões do produto na orientação a ser testada
-
-        Returns:
-            Tupla com (total de produtos, distribuição por eixo (x, y, z))
-        """
-        # Verifica se o produto cabe nas dimensões do contêiner
-        if (orientation[0] > self.container.dimensions.x or
-            orientation[1] > self.container.effective_y or
-            orientation[2] > self.container.dimensions.z):
-            return 0, (0, 0, 0)
-
-        count_x = math.floor(self.container.dimensions.x / orientation[0])
-        count_y = math.floor(self.container.effective_y / orientation[1])
-        count_z = math.floor(self.container.dimensions.z / orientation[2])
-
-        total = count_x * count_y * count_z
-        return total, (count_x, count_y, count_z)
-
-    def optimize(self) -> Dict:
-        """
-        Encontra a melhor orientação para maximizar a quantidade de produtos no contêiner.
-
-        Returns:
-            Dicionário com resultados da otimização, incluindo quanto os produtos
-            ultrapassam a dimensão original do contêiner em centímetros
-        """
-        orientations = self.product.get_orientations(self.lock_vertical)
-        results = []
-
-        log_text = "Testando orientações:\n"
-        for orientation in orientations:
-            total, distribution = self.calculate_quantity(orientation)
-            orientation_log = f"Orientação {orientation}: {distribution} produtos por eixo, total = {total}"
-            log_text += orientation_log + "\n"
-            
-            # Calcular o quanto ultrapassa na dimensão y
-            y_overhang = max(0, distribution[1] * orientation[1] - self.container.dimensions.y)
-            y_overhang_cm = round(y_overhang * 100, 1)  # Converter para centímetros
-            
-            results.append({
-                "orientation": orientation,
-                "total": total,
-                "distribution": distribution,
-                "y_overhang_cm": y_overhang_cm
-            })
-
-            if total > self.best_count:
-                self.best_count = total
-                self.best_orientation = orientation
-                self.best_distribution = distribution
-                self.best_overhang_cm = y_overhang_cm
-
-        if self.best_count == 0:
-            log_text += "\nNenhuma orientação do produto cabe no contêiner."
-            self.best_overhang_cm = 0
-        else:
-            log_text += "\nMelhor orientação encontrada:\n"
-            log_text += f"Produto orientado como: {self.best_orientation}\n"
-            log_text += f"Quantidade por eixo (x, y, z): {self.best_distribution}\n"
-            log_text += f"Total de produtos que cabem: {self.best_count}\n"
-            log_text += f"Projeção além da gaiola: {self.best_overhang_cm} cm"
-
-        return {
-            "best_orientation": self.best_orientation,
-            "best_count": self.best_count,
-            "best_distribution": self.best_distribution,
-            "overflow_y": self.best_overhang_cm,
-            "all_results": results,
-            "log_text": log_text
-        }
+"""
+Módulo com classes para otimização de empacotamento 3D em gaiolas ou contêineres.
+"""
+
+import functools
+from typing import Tuple, List, Dict, NamedTuple
+
+import numpy as np
+
+from optimizer_kernels import pack_counts
+
+
+class Dimension3D(NamedTuple):
+    """
+    Classe para representar dimensões 3D.
+
+    Como NamedTuple os atributos são acessados por descritores em C (mais
+    rápido que o __dict__ de um dataclass) e a instância se comporta como
+    tupla, permitindo desempacotamento direto: x, y, z = dimensions.
+    """
+    x: float
+    y: float
+    z: float
+
+    def as_tuple(self) -> Tuple[float, float, float]:
+        """Retorna as dimensões como uma tupla."""
+        return tuple(self)
+
+
+class Container:
+    """Classe para representar um contêiner ou gaiola."""
+
+    def __init__(self, x: float, y: float, z: float, y_tolerance: float = 0):
+        """
+        Inicializa um contêiner com dimensões específicas.
+
+        Args:
+            x: Comprimento do contêiner (metros)
+            y: Profundidade do contêiner (metros)
+            z: Altura do contêiner (metros)
+            y_tolerance: Tolerância adicional na dimensão y (metros)
+        """
+        self.dimensions = Dimension3D(x, y, z)
+        self.y_tolerance = y_tolerance
+        # Dimensões em milímetros inteiros: a aritmética do empacotamento é
+        # exata em mm, sem os erros de arredondamento da divisão em float
+        self.dims_mm = tuple(int(round(d * 1000)) for d in (x, y, z))
+        self.y_tolerance_mm = int(round(y_tolerance * 1000))
+
+    @property
+    def effective_y(self) -> float:
+        """Retorna a profundidade efetiva com tolerância."""
+        return self.dimensions.y + self.y_tolerance
+
+    @property
+    def effective_y_mm(self) -> int:
+        """Retorna a profundidade efetiva com tolerância, em milímetros."""
+        return self.dims_mm[1] + self.y_tolerance_mm
+
+
+# Permutações de índices das dimensões, precomputadas uma única vez
+_PERMS = np.array([[0, 1, 2], [0, 2, 1], [1, 0, 2],
+                   [1, 2, 0], [2, 0, 1], [2, 1, 0]], dtype=np.intp)
+_PERMS_LOCK = np.array([[0, 1, 2], [1, 0, 2]], dtype=np.intp)
+
+
+@functools.lru_cache(maxsize=1024)
+def _orientations(dimensions: Tuple[float, float, float], lock_vertical: bool) -> np.ndarray:
+    """
+    Calcula (e memoiza) as orientações distintas para um conjunto de dimensões.
+
+    Args:
+        dimensions: Tupla (comprimento, largura, altura) do produto
+        lock_vertical: Se True, mantém a última dimensão fixa (vertical)
+
+    Returns:
+        Array NumPy (N, 3) com as orientações distintas, uma por linha
+    """
+    # Indexa as dimensões com a tabela de permutações e remove orientações
+    # duplicadas (produtos com dimensões repetidas geram permutações iguais)
+    table = _PERMS_LOCK if lock_vertical else _PERMS
+    orientations = np.unique(np.asarray(dimensions)[table], axis=0)
+    # O array fica compartilhado entre chamadas: protege contra mutação acidental
+    orientations.setflags(write=False)
+    return orientations
+
+
+class Product:
+    """Classe para representar um produto com dimensões 3D."""
+
+    def __init__(self, length: float, width: float, height: float):
+        """
+        Inicializa um produto com dimensões específicas.
+
+        Args:
+            length: Primeira dimensão do produto (metros)
+            width: Segunda dimensão do produto (metros)
+            height: Terceira dimensão do produto (metros)
+        """
+        self.dimensions = (length, width, height)
+        self.dims_mm = tuple(int(round(d * 1000)) for d in self.dimensions)
+        # Ambas as variantes resolvidas uma única vez na construção; chamadas
+        # repetidas de get_orientations viram uma consulta de dicionário
+        self._orientations = {
+            False: _orientations(self.dimensions, False),
+            True: _orientations(self.dimensions, True),
+        }
+
+    def get_orientations(self, lock_vertical: bool = False) -> np.ndarray:
+        """
+        Retorna todas as orientações possíveis para o produto.
+
+        Args:
+            lock_vertical: Se True, mantém a última dimensão fixa (vertical)
+
+        Returns:
+            Array NumPy (N, 3) com as orientações distintas, uma por linha
+        """
+        return self._orientations[lock_vertical]
+
+
+# Limite de produtos aceito pelas visualizações: acima disso a malha 3D
+# deixaria o app irresponsivo (ou sem memória) antes de renderizar
+MAX_RENDER_PRODUCTS = 50_000
+
+
+class PackingOptimizer:
+    """Classe para otimizar o empacotamento de produtos em um contêiner."""
+
+    def __init__(self, container: Container, product: Product, lock_vertical: bool = False):
+        """
+        Inicializa o otimizador com um contêiner e um produto.
+
+        Args:
+            container: O contêiner ou gaiola a ser preenchido
+            product: O produto a ser colocado no contêiner
+            lock_vertical: Se True, mantém a última dimensão do produto fixa
+        """
+        self.container = container
+        self.product = product
+        self.lock_vertical = lock_vertical
+        # Dimensões efetivas do contêiner em mm, invariantes por otimizador:
+        # evita repetir os acessos a atributo/property em cada cálculo
+        self._cont_mm = (container.dims_mm[0],
+                         container.effective_y_mm,
+                         container.dims_mm[2])
+        self.best_orientation = None
+        self.best_count = 0
+        self.best_distribution = (0, 0, 0)
+
+    def calculate_quantity(self, orientation: Tuple[float, float, float]) -> Tuple[int, Tuple[int, int, int]]:
+        """
+        Calcula a quantidade de produtos que cabem no contêiner com uma orientação específica.
+
+        Args:
+            orientation: Tupla com dimensões do produto na orientação a ser testada
+
+        Returns:
+            Tupla com (total de produtos, distribuição por eixo (x, y, z))
+        """
+        # Escala para milímetros inteiros: a divisão inteira é exata e evita
+        # subcontagem por arredondamento de float (ex.: 2.25/0.75 -> 2.9999...)
+        cont_mm = self._cont_mm
+        orient_mm = tuple(int(round(d * 1000)) for d in orientation)
+
+        # Verifica se o produto cabe nas dimensões do contêiner
+        if (orient_mm[0] > cont_mm[0] or
+            orient_mm[1] > cont_mm[1] or
+            orient_mm[2] > cont_mm[2]):
+            return 0, (0, 0, 0)
+
+        count_x = cont_mm[0] // orient_mm[0]
+        count_y = cont_mm[1] // orient_mm[1]
+        count_z = cont_mm[2] // orient_mm[2]
+
+        total = count_x * count_y * count_z
+        return total, (count_x, count_y, count_z)
+
+    def optimize(self, verbose: bool = True, return_all: bool = False) -> Dict:
+        """
+        Encontra a melhor orientação para maximizar a quantidade de produtos no contêiner.
+
+        Args:
+            verbose: Se True, monta o log detalhado por orientação; se False,
+                calcula apenas os campos best_*
+            return_all: Se True, preenche "all_results" com um dicionário por
+                orientação; nenhum consumidor atual precisa disso
+
+        Returns:
+            Dicionário com resultados da otimização, incluindo quanto os produtos
+            ultrapassam a dimensão original do contêiner em centímetros
+        """
+        orientations = self.product.get_orientations(self.lock_vertical)
+        results = []
+
+        # Avalia todas as orientações de uma vez em vez de iterar
+        # em Python chamando calculate_quantity por orientação
+        # Milímetros inteiros: divisão inteira exata, sem a tolerância de
+        # epsilon que o caminho em float exigia para múltiplos exatos
+        orients_mm = np.rint(np.asarray(orientations, dtype=np.float64) * 1000).astype(np.int64)
+        cont_mm = np.array(self._cont_mm, dtype=np.int64)
+        totals, counts = pack_counts(cont_mm, orients_mm)
+
+        # Quanto cada orientação ultrapassa na dimensão y (em metros),
+        # calculado para todas as linhas de uma vez; a conversão para
+        # centímetros e o arredondamento ficam para a melhor orientação
+        y_overhangs = np.maximum(
+            0, counts[:, 1] * np.asarray(orientations)[:, 1] - self.container.dimensions.y
+        )
+
+        best_overhang = 0.0
+        log_lines = ["Testando orientações:"]
+        for row in range(len(orientations)):
+            # Tupla de floats nativos: evita escalares NumPy nos resultados/logs
+            orientation = tuple(float(v) for v in orientations[row])
+            total = int(totals[row])
+            distribution = tuple(int(c) for c in counts[row])
+
+            if verbose:
+                log_lines.append(
+                    f"Orientação {orientation}: {distribution} produtos por eixo, total = {total}"
+                )
+            if return_all:
+                results.append({
+                    "orientation": orientation,
+                    "total": total,
+                    "distribution": distribution,
+                    "y_overhang_cm": round(float(y_overhangs[row]) * 100, 1)
+                })
+
+            if total > self.best_count:
+                self.best_count = total
+                self.best_orientation = orientation
+                self.best_distribution = distribution
+                best_overhang = float(y_overhangs[row])
+
+        # Converte e arredonda uma única vez, apenas para o melhor resultado
+        self.best_overhang_cm = round(best_overhang * 100, 1)
+
+        # Entradas patológicas (dimensões minúsculas) gerariam milhões de
+        # cubóides nas visualizações; sinaliza para o app não renderizar
+        self.render_limit_exceeded = self.best_count > MAX_RENDER_PRODUCTS
+        if self.render_limit_exceeded:
+            log_lines.append(
+                f"\nAviso: {self.best_count} produtos excedem o limite de "
+                f"{MAX_RENDER_PRODUCTS} para visualização."
+            )
+
+        if self.best_count == 0:
+            log_lines.append("\nNenhuma orientação do produto cabe no contêiner.")
+        else:
+            log_lines.extend([
+                "\nMelhor orientação encontrada:",
+                f"Produto orientado como: {self.best_orientation}",
+                f"Quantidade por eixo (x, y, z): {self.best_distribution}",
+                f"Total de produtos que cabem: {self.best_count}",
+                f"Projeção além da gaiola: {self.best_overhang_cm} cm",
+            ])
+
+        log_text = "\n".join(log_lines)
+
+        return {
+            "best_orientation": self.best_orientation,
+            "best_count": self.best_count,
+            "best_distribution": self.best_distribution,
+            "overflow_y": self.best_overhang_cm,
+            "render_limit_exceeded": self.render_limit_exceeded,
+            "all_results": results,
+            "log_text": log_text
+        }
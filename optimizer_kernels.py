@@ -0,0 +1,59 @@
+"""
+Kernels numéricos do cálculo de empacotamento, separados para uso em lote.
+
+Com Numba instalado o kernel é compilado com @njit; sem ele uma
+implementação NumPy pura com a mesma assinatura é usada, mantendo a
+dependência opcional.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+    _HAS_NUMBA = True
+except ImportError:
+    # Numba é opcional: sem ele o kernel roda em NumPy puro
+    _HAS_NUMBA = False
+
+
+if _HAS_NUMBA:
+    @njit(cache=True, fastmath=True)
+    def pack_counts(cont, orients):
+        """
+        Kernel compilado: calcula totais e contagens por eixo para cada orientação.
+
+        Args:
+            cont: Array (3,) com as dimensões efetivas do contêiner
+            orients: Array (N, 3) com as orientações candidatas
+
+        Returns:
+            Tupla (totals (N,), counts (N, 3)) com totais e contagens por eixo
+        """
+        n = orients.shape[0]
+        totals = np.zeros(n, np.int64)
+        counts = np.zeros((n, 3), np.int64)
+        for row in range(n):
+            if (orients[row, 0] <= cont[0] and
+                orients[row, 1] <= cont[1] and
+                orients[row, 2] <= cont[2]):
+                for axis in range(3):
+                    counts[row, axis] = int(cont[axis] // orients[row, axis])
+                totals[row] = counts[row, 0] * counts[row, 1] * counts[row, 2]
+        return totals, counts
+else:
+    def pack_counts(cont, orients):
+        """
+        Calcula totais e contagens por eixo para cada orientação (NumPy puro).
+
+        Args:
+            cont: Array (3,) com as dimensões efetivas do contêiner
+            orients: Array (N, 3) com as orientações candidatas
+
+        Returns:
+            Tupla (totals (N,), counts (N, 3)) com totais e contagens por eixo
+        """
+        fits = (orients <= cont).all(axis=1)
+        counts = (cont // orients).astype(np.int64)
+        counts[~fits] = 0
+        totals = counts.prod(axis=1)
+        return totals, counts
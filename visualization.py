@@ -1,199 +1,343 @@
-"""
-Módulo para visualização 3D de contêineres e produtos empacotados.
-"""
-
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d.art3d import Poly3DCollection
-import plotly.graph_objects as go
-
-
-def draw_cuboid(ax, origin, size, color='cyan', alpha=0.5, edgecolor='k'):
-    """
-    Desenha um paralelepípedo (cubóide) em um eixo 3D.
-
-    Args:
-        ax: Eixo matplotlib para desenho
-        origin: (x, y, z) - coordenada da esquina inferior esquerda
-        size: (dx, dy, dz) - dimensões do cubóide
-        color: Cor do cubóide
-        alpha: Transparência
-        edgecolor: Cor da borda
-    """
-    ox, oy, oz = origin
-    dx, dy, dz = size
-
-    # Define os vértices do cubóide
-    vertices = [
-        [ox, oy, oz],
-        [ox+dx, oy, oz],
-        [ox+dx, oy+dy, oz],
-        [ox, oy+dy, oz],
-        [ox, oy, oz+dz],
-        [ox+dx, oy, oz+dz],
-        [ox+dx, oy+dy, oz+dz],
-        [ox, oy+dy, oz+dz],
-    ]
-
-    # Define as faces usando os vértices
-    faces = [
-        [vertices[i] for i in [0,1,2,3]],  # base inferior
-        [vertices[i] for i in [4,5,6,7]],  # base superior
-        [vertices[i] for i in [0,1,5,4]],  # lateral 1
-        [vertices[i] for i in [1,2,6,5]],  # lateral 2
-        [vertices[i] for i in [2,3,7,6]],  # lateral 3
-        [vertices[i] for i in [3,0,4,7]],  # lateral 4
-    ]
-
-    # Cria e adiciona a coleção de polígonos
-    pc = Poly3DCollection(faces, facecolors=color, edgecolors=edgecolor, alpha=alpha)
-    ax.add_collection3d(pc)
-
-
-def visualize_static(optimizer, fig_size=(12, 8), style='default', 
-                     product_color='skyblue', product_alpha=0.7):
-    """
-    Cria uma visualização 3D estática da disposição dos produtos no contêiner.
-
-    Args:
-        optimizer: Objeto PackingOptimizer com resultados de otimização
-        fig_size: Tamanho da figura (largura, altura)
-        style: Estilo matplotlib a ser usado
-        product_color: Cor fixa para todos os produtos
-        product_alpha: Transparência (alpha) para todos os produtos
-
-    Returns:
-        Objeto figura e eixo matplotlib
-    """
-    fig = plt.figure(figsize=fig_size)
-    ax = fig.add_subplot(111, projection='3d')
-    
-    # Definir fundo branco explicitamente
-    fig.patch.set_facecolor('white')
-    ax.set_facecolor('white')
-
-    # Desenha o contêiner
-    draw_cuboid(
-        ax,
-        origin=(0, 0, 0),
-        size=(optimizer.container.dimensions.x, optimizer.container.dimensions.y, optimizer.container.dimensions.z),
-        color='lightgray',
-        alpha=0.1,
-        edgecolor='k'
-    )
-
-    # Desenha os produtos se houver uma solução válida
-    if optimizer.best_count > 0:
-        count_x, count_y, count_z = optimizer.best_distribution
-        orientation = optimizer.best_orientation
-
-        for i in range(count_x):
-            for j in range(count_y):
-                for k in range(count_z):
-                    origin = (i * orientation[0], j * orientation[1], k * orientation[2])
-                    draw_cuboid(
-                        ax,
-                        origin=origin,
-                        size=orientation,
-                        color=product_color,
-                        alpha=product_alpha,
-                        edgecolor='k'
-                    )
-
-    # Adicionar margem extra para evitar cortes
-    x_margin = optimizer.container.dimensions.x * 0.1
-    y_margin = optimizer.container.dimensions.y * 0.1
-    z_margin = optimizer.container.dimensions.z * 0.1
-    
-    # Configurações do gráfico com margens extras
-    ax.set_xlim(-x_margin, optimizer.container.dimensions.x + x_margin)
-    ax.set_ylim(-y_margin, optimizer.container.dimensions.y + y_margin)
-    ax.set_zlim(-z_margin, optimizer.container.dimensions.z + z_margin)
-    
-    ax.set_xlabel('Comprimento (m)')
-    ax.set_ylabel('Profundidade (m)')
-    ax.set_zlabel('Altura (m)')
-
-    # Configurar melhor ângulo de visão
-    ax.view_init(elev=30, azim=45)
-    ax.grid(True)
-
-    # Usar tight_layout com padding específico para evitar cortes
-    plt.tight_layout(pad=3.0)
-    
-    return fig, ax
-
-
-def visualize_interactive(optimizer, cor_produto, transparency):
-    """
-    Cria uma visualização 3D interativa usando Plotly.
-
-    Args:
-        optimizer: Objeto PackingOptimizer com resultados de otimização
-        cor_produto: Cor para os produtos
-                
-    Returns:
-        Objeto de figura Plotly
-    """
-    fig = go.Figure()
-
-    # Definir dimensões do contêiner
-    container_x, container_y, container_z = optimizer.container.dimensions.as_tuple()
-
-    # Adicionar o contêiner (transparente)
-    fig.add_trace(go.Mesh3d(
-        x=[0, container_x, container_x, 0, 0, container_x, container_x, 0],
-        y=[0, 0, container_y, container_y, 0, 0, container_y, container_y],
-        z=[0, 0, 0, 0, container_z, container_z, container_z, container_z],
-        i = [7, 0, 0, 0, 4, 4, 6, 6, 4, 0, 3, 2],
-        j = [3, 4, 1, 2, 5, 6, 5, 2, 0, 1, 6, 3],
-        k = [0, 7, 2, 3, 6, 7, 1, 1, 5, 5, 7, 6],
-        opacity=0.6,
-        color='lightgrey',
-        name='Contêiner'
-    ))
-
-    # Adicionar os produtos se houver solução válida
-    if optimizer.best_count > 0:
-        count_x, count_y, count_z = optimizer.best_distribution
-        o_x, o_y, o_z = optimizer.best_orientation
-
-        for i in range(count_x):
-            for j in range(count_y):
-                for k in range(count_z):
-                    x0 = float(i) * float(o_x)
-                    y0 = float(j) * float(o_y)
-                    z0 = float(k) * float(o_z)
-
-                    # Criar os vértices individuais do cubo
-                    x = [x0, x0+o_x, x0+o_x, x0, x0, x0+o_x, x0+o_x, x0]
-                    y = [y0, y0, y0+o_y, y0+o_y, y0, y0, y0+o_y, y0+o_y]
-                    z = [z0, z0, z0, z0, z0+o_z, z0+o_z, z0+o_z, z0+o_z]
-
-                    # Índices para formar todas as 6 faces do cubo
-                    i_indices = [7, 0, 0, 0, 4, 4, 6, 6, 4, 0, 3, 2]
-                    j_indices = [3, 4, 1, 2, 5, 6, 5, 2, 0, 1, 6, 3]
-                    k_indices = [0, 7, 2, 3, 6, 7, 1, 1, 5, 5, 7, 6]
-
-                    # Adicionar cubo sólido
-                    fig.add_trace(go.Mesh3d(
-                        x=x, y=y, z=z, 
-                        i=i_indices, j=j_indices, k=k_indices,
-                        opacity = transparency,
-                        color = cor_produto,
-                        lighting=dict(
-                            ambient=0.9,
-                            roughness=0.1
-                        ),
-                        name='Produto'
-                    ))
-
-    # Configuração do layout
-    fig.update_layout(
-        scene=dict(
-            aspectmode='data',
-            camera=dict(eye=dict(x=1.5, y=1.5, z=1.5))
-        ),
-        margin=dict(l=0, r=0, b=0, t=30)
-    )
-
-    return fig
+"""
+Módulo para visualização 3D de contêineres e produtos empacotados.
+"""
+
+import numpy as np
+
+# matplotlib e plotly são importados dentro das funções que os usam: a
+# inicialização de backend dos dois é cara e só precisa acontecer quando
+# a visualização correspondente é de fato construída
+
+
+# Vértices do cubo unitário: escalar por (dx, dy, dz) e somar a origem
+# produz qualquer paralelepípedo sem reconstruir listas Python
+_UNIT_CUBE = np.array([
+    [0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0],
+    [0, 0, 1], [1, 0, 1], [1, 1, 1], [0, 1, 1],
+], dtype=np.float64)
+
+# Índices dos vértices que formam as 6 faces (quadriláteros) do cubo
+_FACE_IDX = np.array([
+    [0, 1, 2, 3],  # base inferior
+    [4, 5, 6, 7],  # base superior
+    [0, 1, 5, 4],  # lateral 1
+    [1, 2, 6, 5],  # lateral 2
+    [2, 3, 7, 6],  # lateral 3
+    [3, 0, 4, 7],  # lateral 4
+], dtype=np.int64)
+
+# Índices de triângulos (i, j, k) das 12 faces triangulares do Mesh3d
+_MESH_I = np.array([7, 0, 0, 0, 4, 4, 6, 6, 4, 0, 3, 2], dtype=np.int32)
+_MESH_J = np.array([3, 4, 1, 2, 5, 6, 5, 2, 0, 1, 6, 3], dtype=np.int32)
+_MESH_K = np.array([0, 7, 2, 3, 6, 7, 1, 1, 5, 5, 7, 6], dtype=np.int32)
+
+# Configuração de iluminação compartilhada pelos traces de produto
+_LIGHTING = dict(
+    ambient=0.9,
+    roughness=0.1
+)
+
+# Orçamento de geometria da visão interativa: acima de _MESH_BUDGET produtos
+# a malha sólida vira marcadores; acima de _MARKER_BUDGET os marcadores são
+# subamostrados para manter o navegador responsivo
+_MESH_BUDGET = 2000
+_MARKER_BUDGET = 5000
+
+
+def _grid_offsets(distribution, orientation):
+    """
+    Gera as posições de origem de todos os produtos na grade.
+
+    Args:
+        distribution: (count_x, count_y, count_z) - produtos por eixo
+        orientation: (o_x, o_y, o_z) - dimensões do produto orientado
+
+    Returns:
+        Array NumPy (N, 3) com a origem de cada produto
+    """
+    return (np.indices(distribution, dtype=np.float64)
+            .reshape(3, -1).T * np.asarray(orientation))
+
+
+def build_cuboid_faces(origin, size):
+    """
+    Monta as 6 faces (quadriláteros) de um paralelepípedo.
+
+    Args:
+        origin: (x, y, z) - coordenada da esquina inferior esquerda
+        size: (dx, dy, dz) - dimensões do cubóide
+
+    Returns:
+        Array NumPy (6, 4, 3) com os vértices de cada face
+    """
+    vertices = _UNIT_CUBE * np.asarray(size) + np.asarray(origin)
+    return vertices[_FACE_IDX]
+
+
+def visualize_static(optimizer, fig_size=(12, 8), style='default', 
+                     product_color='skyblue', product_alpha=0.7):
+    """
+    Cria uma visualização 3D estática da disposição dos produtos no contêiner.
+
+    Args:
+        optimizer: Objeto PackingOptimizer com resultados de otimização
+        fig_size: Tamanho da figura (largura, altura)
+        style: Estilo matplotlib a ser usado
+        product_color: Cor fixa para todos os produtos
+        product_alpha: Transparência (alpha) para todos os produtos
+
+    Returns:
+        Objeto figura e eixo matplotlib
+    """
+    import matplotlib.pyplot as plt
+    from mpl_toolkits.mplot3d.art3d import Poly3DCollection
+
+    fig, ax = plt.subplots(figsize=fig_size, subplot_kw={'projection': '3d'})
+
+    # Definir fundo branco explicitamente
+    fig.patch.set_facecolor('white')
+    ax.set_facecolor('white')
+
+    # Projeção ortográfica: mais barata que perspectiva para caixas alinhadas
+    ax.set_proj_type('ortho')
+
+    # Desenha o contêiner
+    container_faces = build_cuboid_faces(
+        origin=(0, 0, 0),
+        size=optimizer.container.dimensions.as_tuple()
+    )
+    ax.add_collection3d(
+        Poly3DCollection(container_faces, facecolors='lightgray', edgecolors='k', alpha=0.1)
+    )
+
+    # Desenha os produtos se houver uma solução válida
+    if optimizer.best_count > 0:
+        orientation = optimizer.best_orientation
+
+        # Gera as faces de todos os produtos de uma vez e adiciona uma única
+        # Poly3DCollection em vez de um artista por produto
+        base_faces = build_cuboid_faces((0, 0, 0), orientation)
+        offsets = _grid_offsets(optimizer.best_distribution, orientation)
+        faces = (base_faces[None, :, :, :] + offsets[:, None, None, :]).reshape(-1, 4, 3)
+
+        pc = Poly3DCollection(faces, facecolors=product_color, edgecolors='k', alpha=product_alpha)
+        # Caixas alinhadas aos eixos e sem sobreposição: fixar o z de ordenação
+        # evita o depth-sort O(F log F) a cada draw
+        pc.set_sort_zpos(0)
+        ax.add_collection3d(pc)
+
+    # Adicionar margem extra para evitar cortes
+    x_margin = optimizer.container.dimensions.x * 0.1
+    y_margin = optimizer.container.dimensions.y * 0.1
+    z_margin = optimizer.container.dimensions.z * 0.1
+    
+    # Configurações do gráfico com margens extras
+    ax.set_xlim(-x_margin, optimizer.container.dimensions.x + x_margin)
+    ax.set_ylim(-y_margin, optimizer.container.dimensions.y + y_margin)
+    ax.set_zlim(-z_margin, optimizer.container.dimensions.z + z_margin)
+    
+    ax.set_xlabel('Comprimento (m)')
+    ax.set_ylabel('Profundidade (m)')
+    ax.set_zlabel('Altura (m)')
+
+    # Configurar melhor ângulo de visão
+    ax.view_init(elev=30, azim=45)
+    ax.grid(True)
+
+    # Margens fixas em vez de tight_layout (que dispara um passo extra de layout)
+    fig.subplots_adjust(left=0.05, right=0.95, bottom=0.05, top=0.95)
+
+    return fig, ax
+
+
+def visualize_interactive(optimizer, cor_produto, transparency):
+    """
+    Cria uma visualização 3D interativa usando Plotly.
+
+    Args:
+        optimizer: Objeto PackingOptimizer com resultados de otimização
+        cor_produto: Cor para os produtos
+                
+    Returns:
+        Objeto de figura Plotly
+    """
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+
+    # Definir dimensões do contêiner
+    container_x, container_y, container_z = optimizer.container.dimensions.as_tuple()
+
+    # Adicionar o contêiner (transparente)
+    fig.add_trace(go.Mesh3d(
+        x=[0, container_x, container_x, 0, 0, container_x, container_x, 0],
+        y=[0, 0, container_y, container_y, 0, 0, container_y, container_y],
+        z=[0, 0, 0, 0, container_z, container_z, container_z, container_z],
+        i=_MESH_I,
+        j=_MESH_J,
+        k=_MESH_K,
+        opacity=0.6,
+        color='lightgrey',
+        name='Contêiner'
+    ))
+
+    # Adicionar os produtos se houver solução válida
+    if optimizer.best_count > 0:
+        o_x, o_y, o_z = optimizer.best_orientation
+
+        # Posições de origem de todos os produtos na grade (N, 3)
+        offsets = _grid_offsets(optimizer.best_distribution, optimizer.best_orientation)
+        n_products = offsets.shape[0]
+
+        if n_products > _MESH_BUDGET:
+            # Nível de detalhe reduzido: um marcador quadrado no centro de
+            # cada produto em vez de 8 vértices + 12 triângulos por cubo
+            centers = offsets + np.array([o_x, o_y, o_z]) / 2
+            sample_step = 1
+            if n_products > _MARKER_BUDGET:
+                sample_step = -(-n_products // _MARKER_BUDGET)  # teto da divisão
+                centers = centers[::sample_step]
+
+            fig.add_trace(go.Scatter3d(
+                x=centers[:, 0], y=centers[:, 1], z=centers[:, 2],
+                mode='markers',
+                marker=dict(size=3, symbol='square', color=cor_produto,
+                            opacity=transparency),
+                name='Produto'
+            ))
+            if sample_step > 1:
+                fig.add_annotation(
+                    text=f"Exibindo 1 a cada {sample_step} produtos "
+                         f"({n_products} no total)",
+                    xref='paper', yref='paper', x=0, y=1, showarrow=False
+                )
+        else:
+            # Vértices de um cubo unitário escalado pela orientação do produto
+            base_vertices = _UNIT_CUBE * [o_x, o_y, o_z]
+
+            # Um único Mesh3d com todos os cubos: vértices deslocados e índices
+            # das faces com passo de 8 vértices por cubo
+            vertices = (base_vertices[None, :, :] + offsets[:, None, :]).reshape(-1, 3)
+            stride = np.repeat(np.arange(n_products) * 8, 12)
+
+            fig.add_trace(go.Mesh3d(
+                x=vertices[:, 0], y=vertices[:, 1], z=vertices[:, 2],
+                i=np.tile(_MESH_I, n_products) + stride,
+                j=np.tile(_MESH_J, n_products) + stride,
+                k=np.tile(_MESH_K, n_products) + stride,
+                opacity = transparency,
+                color = cor_produto,
+                flatshading=True,
+                lighting=_LIGHTING,
+                name='Produto'
+            ))
+
+    # Configuração do layout
+    fig.update_layout(
+        scene=dict(
+            aspectmode='data',
+            camera=dict(eye=dict(x=1.5, y=1.5, z=1.5))
+        ),
+        margin=dict(l=0, r=0, b=0, t=30)
+    )
+
+    return fig
+
+
+def visualize_interactive_wire(optimizer, cor_produto):
+    """
+    Cria uma visualização 3D interativa leve, com produtos em wireframe.
+
+    Em vez de malhas sólidas, desenha apenas as arestas de cada produto em
+    um único Scatter3d com segmentos separados por NaN — muito mais barato
+    para o navegador quando há milhares de produtos.
+
+    Args:
+        optimizer: Objeto PackingOptimizer com resultados de otimização
+        cor_produto: Cor para as arestas dos produtos
+
+    Returns:
+        Objeto de figura Plotly
+    """
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+
+    # Definir dimensões do contêiner
+    container_x, container_y, container_z = optimizer.container.dimensions.as_tuple()
+
+    # Adicionar o contêiner (transparente)
+    fig.add_trace(go.Mesh3d(
+        x=[0, container_x, container_x, 0, 0, container_x, container_x, 0],
+        y=[0, 0, container_y, container_y, 0, 0, container_y, container_y],
+        z=[0, 0, 0, 0, container_z, container_z, container_z, container_z],
+        i=_MESH_I,
+        j=_MESH_J,
+        k=_MESH_K,
+        opacity=0.6,
+        color='lightgrey',
+        name='Contêiner'
+    ))
+
+    if optimizer.best_count > 0:
+        orientation = optimizer.best_orientation
+
+        base_vertices = _UNIT_CUBE * np.asarray(orientation)
+
+        # As 12 arestas do cubo como pares de índices de vértices
+        edges = np.array([
+            [0, 1], [1, 2], [2, 3], [3, 0],
+            [4, 5], [5, 6], [6, 7], [7, 4],
+            [0, 4], [1, 5], [2, 6], [3, 7],
+        ])
+
+        offsets = _grid_offsets(optimizer.best_distribution, orientation)
+        n_products = offsets.shape[0]
+
+        # (N, 8, 3) vértices -> (N, 12, 2, 3) segmentos; um NaN após cada
+        # segmento quebra a linha no Scatter3d
+        vertices = base_vertices[None, :, :] + offsets[:, None, :]
+        segments = vertices[:, edges, :]
+        segments = np.concatenate(
+            [segments, np.full((n_products, 12, 1, 3), np.nan)], axis=2
+        ).reshape(-1, 3)
+
+        fig.add_trace(go.Scatter3d(
+            x=segments[:, 0], y=segments[:, 1], z=segments[:, 2],
+            mode='lines',
+            line=dict(color=cor_produto),
+            name='Produto'
+        ))
+
+    # Configuração do layout
+    fig.update_layout(
+        scene=dict(
+            aspectmode='data',
+            camera=dict(eye=dict(x=1.5, y=1.5, z=1.5))
+        ),
+        margin=dict(l=0, r=0, b=0, t=30)
+    )
+
+    return fig
+
+
+def visualize_static_png(optimizer, cor_produto, transparency, width=1000, height=800):
+    """
+    Gera um PNG estático da visualização reaproveitando a malha Plotly.
+
+    Usa o mesmo caminho de construção de malha de visualize_interactive e
+    rasteriza via kaleido, evitando um segundo caminho de desenho para a
+    visão estática. Requer o pacote kaleido instalado.
+
+    Args:
+        optimizer: Objeto PackingOptimizer com resultados de otimização
+        cor_produto: Cor para os produtos
+        transparency: Transparência dos produtos
+        width: Largura da imagem em pixels
+        height: Altura da imagem em pixels
+
+    Returns:
+        Bytes do PNG renderizado
+    """
+    fig = visualize_interactive(optimizer, cor_produto, transparency)
+    return fig.to_image(format='png', width=width, height=height)